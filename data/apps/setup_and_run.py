@@ -1,5 +1,6 @@
 import os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
 # List of all GitHub repositories to clone
 REPOS = [
@@ -15,17 +16,38 @@ BASE_DIR = "vulnerable_apps"
 
 
 
+def _clone_one(target):
+    """Clone a single repository (shallow, parallel submodules)."""
+    repo_url, repo_path = target
+    repo_name = os.path.basename(repo_path)
+    print(f"Cloning {repo_name}...")
+    # --depth=1 skips history, --jobs=4 parallelizes submodule fetches.
+    # Send stdout to DEVNULL so parallel clones don't interleave terminal output.
+    subprocess.run(
+        ["git", "clone", "--depth=1", "--jobs=4", repo_url, repo_path],
+        stdout=subprocess.DEVNULL,
+        check=False
+    )
+
+
 def clone_repos():
-    """Clone all repositories if they do not exist already."""
+    """Clone all repositories if they do not exist already (in parallel)."""
     if not os.path.exists(BASE_DIR):
         os.makedirs(BASE_DIR)
-    
+
+    # Build the worklist first; clones are network-bound so running them
+    # concurrently brings wall time down to roughly the slowest clone.
+    targets = []
     for repo_url in REPOS:
         repo_name = repo_url.split("/")[-1].replace(".git", "")
         repo_path = os.path.join(BASE_DIR, repo_name)
         if not os.path.exists(repo_path):
-            print(f"Cloning {repo_name}...")
-            subprocess.run(["git", "clone", repo_url, repo_path])
+            targets.append((repo_url, repo_path))
         else:
             print(f"{repo_name} already exists, skipping clone.")
 
+    if not targets:
+        return
+
+    with ThreadPoolExecutor(max_workers=min(8, len(targets))) as executor:
+        list(executor.map(_clone_one, targets))
@@ -1,14 +1,33 @@
 #main.py
 import json
 import argparse
+import functools
+import hashlib
 import logging
+import pickle
+import re
+import shutil
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import os
 import subprocess
 
+import numpy as np
+
+try:
+    import orjson  # fast native JSON writer for the large output artifacts
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack  # binary parsed_files sidecar, much faster to reload
+except ImportError:
+    msgpack = None
+
 # --- Imports ---
-from src.parsers.parsing import TreeSitterParser
-from src.clustering.clustering import cluster_classes_semantically  # NEW: cluster classes
+from src.parsers.parsing import TreeSitterParser, LIB_PATH
+from src.clustering.clustering import cluster_classes_semantically, cluster_classes_flat  # NEW: cluster classes
 from src.summarizing.enhanced_summarizer import EnhancedLlamaSummarizer  # NEW: enhanced summarizer
 from src.generate_results import generate_final_results
 
@@ -32,18 +51,45 @@ logger.info(f"Output directory: {OUTPUT_DIR}")
 # ============================
 # 1. Scan with MobSF
 # ============================
-def scan_with_mobsf(source_folder: str) -> dict:
+MOBSF_CACHE_DIR = Path(".cache/mobsf")
+
+def _source_fingerprint(source_dir: str) -> str:
+    """ETag-style fingerprint of a source tree: (path, size, mtime) per file."""
+    h = hashlib.sha256()
+    for p in sorted(Path(source_dir).rglob("*")):
+        try:
+            if not p.is_file():
+                continue
+            st = p.stat()
+        except OSError:
+            continue
+        h.update(f"{p}|{st.st_size}|{int(st.st_mtime)}\n".encode())
+    return h.hexdigest()
+
+def scan_with_mobsf(source_folder: str, use_cache: bool = True) -> dict:
     logger.info(f"Running MobSF scan on: {source_folder}")
 
+    # Skip the (minutes-long) scan entirely when the source tree is unchanged
+    fingerprint = _source_fingerprint(source_folder)
+    cache_path = MOBSF_CACHE_DIR / f"{fingerprint}.json"
+    if use_cache and cache_path.exists():
+        logger.info(f"✓ Source tree unchanged - loading cached MobSF results from {cache_path}")
+        return _read_json(cache_path)
+
     # Save MobSF output permanently (don't use temp file)
     mobsf_raw_output = os.path.join(OUTPUT_DIR, "mobsf_raw_scan.json")
 
     cmd = ["mobsfscan", "--json", "-o", mobsf_raw_output, source_folder]
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    # Drop stdout entirely (results land in the -o file anyway) and keep
+    # stderr as raw bytes - no point buffering/decoding a chatty scanner's
+    # output that is only ever looked at on failure.
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
 
     if result.returncode != 0:
         logger.warning(f"MobSF returned non-zero exit code {result.returncode}")
         logger.warning("This is NORMAL when vulnerabilities are found - continuing...")
+        if result.stderr:
+            logger.debug(result.stderr.decode(errors="replace"))
 
     if not os.path.exists(mobsf_raw_output):
         logger.error("MobSF scan produced no output file")
@@ -51,8 +97,7 @@ def scan_with_mobsf(source_folder: str) -> dict:
 
     logger.info(f"✓ Raw MobSF results saved to: {mobsf_raw_output}")
 
-    with open(mobsf_raw_output, "r") as f:
-        results = json.load(f)
+    results = _read_json(mobsf_raw_output)
 
     filtered = {"results": {}, "errors": []}
     for vuln_name, vuln_data in results.get("results", {}).items():
@@ -71,6 +116,14 @@ def scan_with_mobsf(source_folder: str) -> dict:
     # Don't delete the raw output - we keep it for reference
     logger.info(f"MobSF scan complete. Found {len(filtered['results'])} vulnerability types with Java files.")
 
+    # Cache the filtered results keyed by the source fingerprint
+    if use_cache:
+        try:
+            MOBSF_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            _write_json(cache_path, filtered)
+        except OSError as e:
+            logger.warning(f"Could not write MobSF cache: {e}")
+
     # Log statistics
     total_java_instances = sum(len(v["files"]) for v in filtered["results"].values())
     logger.info(f"  - Total Java vulnerability instances: {total_java_instances}")
@@ -82,19 +135,90 @@ def scan_with_mobsf(source_folder: str) -> dict:
 # ============================
 # 2. Parse codebase
 # ============================
-def parse_codebase(source_dir: str) -> list:
+def _read_java_source(file_path) -> bytes:
+    """Read a Java file as raw bytes; they feed the parser with no decode."""
+    with open(file_path, "rb") as f:
+        return f.read()
+
+@functools.lru_cache(maxsize=1)
+def _get_worker_parser() -> TreeSitterParser:
+    """One TreeSitterParser per worker process (parsers don't pickle)."""
+    return TreeSitterParser()
+
+# Content-addressed parse cache: re-runs skip files whose bytes are unchanged
+PARSE_CACHE_DIR = Path(".cache/parse")
+# Bump whenever the pickled object layout in src/parsers/objects.py changes
+PARSE_CACHE_SCHEMA = "2"
+
+def _grammar_version() -> str:
+    """Fingerprint of the compiled grammar so stale caches get wiped."""
+    try:
+        st = os.stat(LIB_PATH)
+        return f"{PARSE_CACHE_SCHEMA}-{st.st_size}-{int(st.st_mtime)}"
+    except OSError:
+        return f"{PARSE_CACHE_SCHEMA}-unknown"
+
+def _init_parse_cache():
+    """Create the cache dir, wiping it if the grammar library changed."""
+    version_file = PARSE_CACHE_DIR / "version"
+    version = _grammar_version()
+    if version_file.exists() and version_file.read_text() == version:
+        return
+    if PARSE_CACHE_DIR.exists():
+        shutil.rmtree(PARSE_CACHE_DIR)
+    PARSE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    version_file.write_text(version)
+
+def _parse_one(file_path: str):
+    """Parse a single Java file (cache-aware); runs inside a worker process."""
+    try:
+        source_bytes = _read_java_source(file_path)
+
+        # Cache hit: load the previously parsed model instead of re-parsing
+        h = hashlib.sha256(source_bytes).hexdigest()
+        cache_path = PARSE_CACHE_DIR / h[:2] / f"{h[2:]}.pkl"
+        if cache_path.exists():
+            with open(cache_path, "rb") as f:
+                java_file = pickle.load(f)
+            # Identical content can live at a different path on this run
+            java_file.path = file_path
+            return java_file if java_file.classes else None
+
+        java_file = _get_worker_parser().parse_java_file(source_bytes, file_path)
+        if java_file and java_file.classes:
+            try:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(cache_path, "wb") as f:
+                    pickle.dump(java_file, f, protocol=pickle.HIGHEST_PROTOCOL)
+            except OSError as e:
+                logger.warning(f"Could not write parse cache for {file_path}: {e}")
+            return java_file
+    except Exception as e:
+        logger.error(f"Error parsing {file_path}: {e}", exc_info=True)
+    return None
+
+def parse_codebase(source_dir: str, only_filenames=None) -> list:
+    """
+    Parse all Java files under source_dir. If only_filenames is given
+    (a set of basenames), parsing is restricted to those files - the
+    fast path for reruns where only scan-referenced files matter.
+    """
     logger.info(f"Parsing Java files in: '{source_dir}'")
-    parser = TreeSitterParser()
-    parsed_files = []
-    for file_path in Path(source_dir).rglob("*.java"):
-        try:
-            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                source_code = f.read()
-            java_file = parser.parse_java_file(source_code, str(file_path))
-            if java_file and java_file.classes:
-                parsed_files.append(java_file)
-        except Exception as e:
-            logger.error(f"Error parsing {file_path}: {e}", exc_info=True)
+    _init_parse_cache()
+    paths = [
+        str(p) for p in Path(source_dir).rglob("*.java")
+        if only_filenames is None or p.name in only_filenames
+    ]
+
+    # Parsing is CPU-bound and independent per file - fan out across cores.
+    # Only the resulting JavaFile objects (plain data) cross the boundary.
+    if len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = executor.map(_parse_one, paths, chunksize=16)
+            parsed_files = [jf for jf in results if jf is not None]
+    else:
+        parsed_files = [jf for jf in map(_parse_one, paths) if jf is not None]
+
     logger.info(f"Parsed {len(parsed_files)} Java files successfully.")
     return parsed_files
 
@@ -112,85 +236,149 @@ def cluster_classes(parsed_files: list):
 # ============================
 
 
-def is_position_within_method(mobsf_position, mobsf_lines, method_pos):
-    if not method_pos:
-        return False
-    if mobsf_lines[0] == mobsf_lines[1]:  # single-line vulnerability
-        if method_pos.start_line < mobsf_lines[0] < method_pos.end_line:
-            return True
-        elif method_pos.start_line == mobsf_lines[0] or method_pos.end_line == mobsf_lines[0]:
-            return (method_pos.start_column <= mobsf_position[0] and 
-                    method_pos.end_column >= mobsf_position[1])
-    else:  # multi-line vulnerability
-        if method_pos.start_line <= mobsf_lines[0] and method_pos.end_line >= mobsf_lines[1]:
-            return True
-        elif method_pos.start_line == mobsf_lines[0]:
-            return method_pos.start_column <= mobsf_position[0]
-    return False
+def normalize_path(path):
+    """Normalize path for better matching"""
+    return path.replace("\\", "/").lower()
 
-def identify_vulnerable_methods(scan_results, parsed_files):
-    """Maps vulnerabilities to specific methods and classes"""
-    vulnerable_methods = []
+# Source-root anchors that precede the package path, as one compiled scan
+_ANCHOR_RE = re.compile(r"/(?:java|kotlin)/")
 
-    def normalize_path(path):
-        """Normalize path for better matching"""
-        return path.replace("\\", "/").lower()
+def _path_match_key(path):
+    """
+    Precompute everything paths_match needs from one path:
+    (filename, package path after /java/ or /kotlin/, last 5 components).
+    Doing this once per file instead of once per comparison keeps the
+    vuln x file matching loop free of repeated lower/split work.
+    """
+    norm = normalize_path(path)
 
-    def paths_match(mobsf_path, parsed_path):
-        """Check if two paths refer to the same file"""
-        mobsf_norm = normalize_path(mobsf_path)
-        parsed_norm = normalize_path(parsed_path)
+    filename = norm.rsplit("/", 1)[-1]
 
-        # Get filename
-        mobsf_filename = mobsf_norm.split("/")[-1]
-        parsed_filename = parsed_norm.split("/")[-1]
+    # Extract package-like path (after java/ or kotlin/)
+    anchor_match = _ANCHOR_RE.search(norm)
+    package = norm[anchor_match.end():] if anchor_match else None
 
-        # Must have same filename
-        if mobsf_filename != parsed_filename:
-            return False
+    # Last path components, innermost first, ready for direct tuple equality
+    tail = tuple(reversed([p for p in norm.split("/") if p][-5:]))
+    return filename, package, tail
 
-        # Check if one path contains the other's key components
-        # Extract package-like path (after java/ or kotlin/)
-        for anchor in ["/java/", "/kotlin/"]:
-            if anchor in mobsf_norm and anchor in parsed_norm:
-                mobsf_package = mobsf_norm.split(anchor)[-1]
-                parsed_package = parsed_norm.split(anchor)[-1]
-                return mobsf_package == parsed_package
+def _keys_match(mobsf_key, parsed_key):
+    """Check if two precomputed path keys refer to the same file"""
+    mobsf_filename, mobsf_package, mobsf_tail = mobsf_key
+    parsed_filename, parsed_package, parsed_tail = parsed_key
 
-        # Fallback: check last few path components match
-        mobsf_parts = [p for p in mobsf_norm.split("/") if p][-5:]
-        parsed_parts = [p for p in parsed_norm.split("/") if p][-5:]
+    # Must have same filename
+    if mobsf_filename != parsed_filename:
+        return False
 
-        # Count matching tail components
-        matches = sum(1 for m, p in zip(reversed(mobsf_parts), reversed(parsed_parts)) if m == p)
-        return matches >= 3  # At least 3 components must match
+    # Compare package paths when both sides sit under a source anchor
+    if mobsf_package is not None and parsed_package is not None:
+        return mobsf_package == parsed_package
+
+    # Fallback: the 3 innermost path components must match - a single
+    # C-level compare of two short tuples instead of a zip/sum generator
+    return mobsf_tail[:3] == parsed_tail[:3]
+
+def _class_method_index(java_class, cache):
+    """
+    Per-class view built once: methods plus an int32 (M, 4) matrix of
+    (start_line, end_line, start_column, end_column). The containment
+    predicate then runs as a handful of vectorized comparisons over the
+    whole matrix instead of a Python call per method.
+    """
+    entry = cache.get(id(java_class))
+    if entry is None:
+        methods = [m for m in java_class.methods if m.position]
+        positions = np.array(
+            [(m.position.start_line, m.position.end_line,
+              m.position.start_column, m.position.end_column)
+             for m in methods],
+            dtype=np.int32
+        ).reshape(len(methods), 4)
+        entry = (methods, positions)
+        cache[id(java_class)] = entry
+    return entry
+
+def _find_containing_method(positions, mobsf_position, mobsf_lines):
+    """
+    Find the method whose span contains a MobSF finding, as vectorized
+    comparisons over the class's (start_line, end_line, start_column,
+    end_column) matrix: a strictly-inside line hit, a same-line hit with
+    the columns covered, or (multi-line) a span covering both match
+    lines or starting on the first one at or before its column.
+    Returns the row index of the containing method, or -1.
+    """
+    if positions.size == 0 or not mobsf_lines:
+        return -1
+    start_lines = positions[:, 0]
+    end_lines = positions[:, 1]
+    line0, line1 = mobsf_lines[0], mobsf_lines[-1]
+
+    if line0 == line1:  # single-line vulnerability
+        mask = (start_lines < line0) & (line0 < end_lines)
+        if len(mobsf_position) >= 2:
+            on_edge = (start_lines == line0) | (end_lines == line0)
+            mask |= (on_edge
+                     & (positions[:, 2] <= mobsf_position[0])
+                     & (positions[:, 3] >= mobsf_position[1]))
+    else:  # multi-line vulnerability
+        mask = (start_lines <= line0) & (end_lines >= line1)
+        if len(mobsf_position) >= 1:
+            mask |= (start_lines == line0) & (positions[:, 2] <= mobsf_position[0])
+
+    idx = int(np.argmax(mask))
+    return idx if mask[idx] else -1
+
+def _index_parsed_files(parsed_files):
+    """
+    One pass over the parsed model that produces both downstream views:
+    the flat class list the clusterer needs and the filename-keyed index
+    the vulnerability matcher needs. Fusing the two traversals means the
+    parsed tree is walked once instead of twice.
+    """
+    flat_classes = []
+    parsed_by_filename = defaultdict(list)
+    for pf in parsed_files:
+        key = _path_match_key(pf.path)
+        parsed_by_filename[key[0]].append((pf, key))
+        flat_classes.extend(pf.classes)
+    return flat_classes, parsed_by_filename
+
+def identify_vulnerable_methods(scan_results, parsed_by_filename):
+    """Maps vulnerabilities to specific methods and classes"""
+    vulnerable_methods = []
+    methods_cache = {}
 
     for result_key, vulnerability in scan_results.get("results", {}).items():
         for vuln_file in vulnerability.get("files", []):
             mobsf_path = vuln_file.get("file_path", "")
+            mobsf_key = _path_match_key(mobsf_path)
+
+            mobsf_position = vuln_file.get("match_position", [])
+            mobsf_lines = vuln_file.get("match_lines", [])
 
-            for parsed_file in parsed_files:
-                if paths_match(mobsf_path, parsed_file.path):
+            for parsed_file, parsed_key in parsed_by_filename.get(mobsf_key[0], ()):
+                if _keys_match(mobsf_key, parsed_key):
                     for java_class in parsed_file.classes:
-                        for method in java_class.methods:
-                            if is_position_within_method(
-                                vuln_file.get("match_position", []),
-                                vuln_file.get("match_lines", []),
-                                method.position
-                            ):
-                                vulnerable_methods.append({
-                                    "method": method,
-                                    "class": java_class,
-                                    "file": parsed_file,
-                                    "vulnerability": result_key
-                                })
+                        methods, positions = _class_method_index(java_class, methods_cache)
+                        idx = _find_containing_method(positions, mobsf_position, mobsf_lines)
+                        if idx >= 0:
+                            vulnerable_methods.append({
+                                "method": methods[idx],
+                                "class": java_class,
+                                "file": parsed_file,
+                                "vulnerability": result_key
+                            })
 
     logger.info(f"Identified {len(vulnerable_methods)} vulnerable methods.")
     if len(vulnerable_methods) == 0:
         logger.warning("⚠️  No vulnerable methods found. Check path matching:")
         if scan_results.get("results"):
             sample_mobsf = list(scan_results["results"].values())[0]["files"][0]["file_path"]
-            sample_parsed = parsed_files[0].path if parsed_files else "No parsed files"
+            sample_parsed = next(
+                (entry[0].path for bucket in parsed_by_filename.values() for entry in bucket),
+                "No parsed files"
+            )
             logger.warning(f"   MobSF path example: {sample_mobsf}")
             logger.warning(f"   Parsed path example: {sample_parsed}")
 
@@ -199,6 +387,29 @@ def identify_vulnerable_methods(scan_results, parsed_files):
 # ============================
 # 5. Generate summaries (NEW: Enhanced with method call analysis)
 # ============================
+# Cross-run summary cache keyed by SHA-256 of the summarized code
+SUMMARY_CACHE_DIR = Path(".cache/summaries")
+
+def _code_hash(code: str) -> str:
+    return hashlib.sha256(code.encode()).hexdigest()
+
+def _load_cached_summary(code_hash: str):
+    path = SUMMARY_CACHE_DIR / code_hash[:2] / code_hash[2:]
+    if path.exists():
+        try:
+            return path.read_text()
+        except OSError:
+            return None
+    return None
+
+def _store_cached_summary(code_hash: str, summary: str):
+    path = SUMMARY_CACHE_DIR / code_hash[:2] / code_hash[2:]
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(summary)
+    except OSError as e:
+        logger.warning(f"Could not write summary cache: {e}")
+
 def generate_summaries(clusters, vulnerable_methods):
     logger.info("="*60)
     logger.info("Starting summarization phase...")
@@ -210,27 +421,92 @@ def generate_summaries(clusters, vulnerable_methods):
     logger.info("✓ Model loaded successfully!")
     summaries = {"clusters": {}, "classes": {}, "methods": {}}
 
-    # Generate cluster summaries (clusters now contain classes, not methods)
+    # --- Cluster summaries (batched; clusters now contain classes, not methods) ---
+    cluster_ids, cluster_prompts, cluster_fallbacks = [], [], []
     for idx, cluster in enumerate(clusters):
         cluster_id = f"cluster_{idx+1}"
-        summaries["clusters"][cluster_id] = summarizer.summarize_cluster(cluster)
-        logger.info(f"Generated summary for {cluster_id} ({len(cluster)} classes)")
-
-    # Generate method and class summaries for vulnerable methods
+        prompt = summarizer.build_cluster_prompt(cluster)
+        if prompt is None:
+            summaries["clusters"][cluster_id] = "Empty cluster"
+            continue
+        cluster_ids.append(cluster_id)
+        cluster_prompts.append(prompt)
+        cluster_fallbacks.append(summarizer.cluster_fallback_summary(cluster))
+
+    for cluster_id, summary in zip(
+        cluster_ids,
+        summarizer.summarize_batch(cluster_prompts, max_length=200, fallbacks=cluster_fallbacks)
+    ):
+        summaries["clusters"][cluster_id] = summary
+        logger.info(f"Generated summary for {cluster_id}")
+
+    # --- Method and class summaries for vulnerable methods (batched) ---
+    # Deduplicate identical code up front (boilerplate getters/setters etc.)
+    # so each unique snippet costs exactly one LLM call.
+    method_keys_by_code = {}
+    classes_by_name = {}
     for vuln_info in vulnerable_methods:
         method = vuln_info["method"]
         java_class = vuln_info["class"]
         method_key = f"{java_class.name}.{method.name}"
-
-        # Method summary
-        if method_key not in summaries["methods"]:
-            summaries["methods"][method_key] = summarizer.summarize_code(method.code)
-
-        # Class summary WITH CONTEXT (NEW: analyzes method calls)
-        class_key = java_class.name
-        if class_key not in summaries["classes"]:
-            summaries["classes"][class_key] = summarizer.summarize_class_with_context(java_class)
-            logger.info(f"Generated enhanced summary for class '{class_key}'")
+        method_keys_by_code.setdefault(method.code, []).append(method_key)
+        classes_by_name.setdefault(java_class.name, java_class)
+
+    # Serve previously summarized code straight from the on-disk cache and
+    # only send cache misses to the model.
+    method_codes, cached_method_hits = [], 0
+    for code in method_keys_by_code:
+        cached = _load_cached_summary(_code_hash(code))
+        if cached is not None:
+            cached_method_hits += 1
+            for method_key in method_keys_by_code[code]:
+                summaries["methods"][method_key] = cached
+        else:
+            method_codes.append(code)
+    if cached_method_hits:
+        logger.info(f"Reused {cached_method_hits} method summaries from cache.")
+
+    method_prompts = [summarizer.build_code_prompt(code) for code in method_codes]
+    for code, summary in zip(method_codes, summarizer.summarize_batch(method_prompts, max_length=100)):
+        _store_cached_summary(_code_hash(code), summary)
+        for method_key in method_keys_by_code[code]:
+            summaries["methods"][method_key] = summary
+
+    # Class summaries WITH CONTEXT (NEW: analyzes method calls)
+    class_names, cached_class_hits = [], 0
+    for name, java_class in classes_by_name.items():
+        cached = _load_cached_summary(_code_hash(java_class.code))
+        if cached is not None:
+            cached_class_hits += 1
+            summaries["classes"][name] = cached
+        else:
+            class_names.append(name)
+    if cached_class_hits:
+        logger.info(f"Reused {cached_class_hits} class summaries from cache.")
+
+    class_prompts = [summarizer.build_class_prompt(classes_by_name[name]) for name in class_names]
+    # A context-enriched prompt can overflow the model window where the
+    # basic code prompt still fits; mark overflows with a sentinel and
+    # retry them without context, as summarize_class_with_context does.
+    _too_long = object()
+    class_summaries = summarizer.summarize_batch(
+        class_prompts, max_length=150, fallbacks=[_too_long] * len(class_prompts)
+    )
+    retry_names = [name for name, s in zip(class_names, class_summaries) if s is _too_long]
+    if retry_names:
+        logger.info(f"{len(retry_names)} class prompts exceeded context; retrying without context info.")
+        retried = dict(zip(retry_names, summarizer.summarize_batch(
+            [summarizer.build_code_prompt(classes_by_name[name].code) for name in retry_names],
+            max_length=150
+        )))
+        class_summaries = [
+            retried[name] if s is _too_long else s
+            for name, s in zip(class_names, class_summaries)
+        ]
+    for class_key, summary in zip(class_names, class_summaries):
+        _store_cached_summary(_code_hash(classes_by_name[class_key].code), summary)
+        summaries["classes"][class_key] = summary
+        logger.info(f"Generated enhanced summary for class '{class_key}'")
 
     logger.info("All summaries generated with method call context.")
     return summaries
@@ -238,59 +514,55 @@ def generate_summaries(clusters, vulnerable_methods):
 # ============================
 # 6. Save outputs
 # ============================
+def _write_json(path, obj):
+    """
+    Write a JSON artifact, preferring orjson (native, ~5-10x faster).
+
+    A .hash sidecar records the SHA-256 of what was last written; if the
+    serialized content is unchanged (common for parsed_files.json on
+    scan-only reruns) the write is skipped entirely.
+    """
+    if orjson is not None:
+        data = orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    else:
+        data = json.dumps(obj, indent=2).encode()
+
+    content_hash = hashlib.sha256(data).hexdigest()
+    hash_path = f"{path}.hash"
+    if os.path.exists(path) and os.path.exists(hash_path):
+        try:
+            with open(hash_path, "r") as f:
+                if f.read() == content_hash:
+                    logger.info(f"Unchanged content, skipping rewrite of {path}")
+                    return
+        except OSError:
+            pass
+
+    with open(path, "wb") as f:
+        f.write(data)
+    with open(hash_path, "w") as f:
+        f.write(content_hash)
+
+def _read_json(path):
+    """Read a JSON artifact, preferring orjson (native, 3-5x faster parse)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
 def save_outputs(scan_results, parsed_files, clusters, summaries):
     # 1. Scan results
-    with open(os.path.join(OUTPUT_DIR, "mobsf_scan.json"), "w") as f:
-        json.dump(scan_results, f, indent=2)
+    _write_json(os.path.join(OUTPUT_DIR, "mobsf_scan.json"), scan_results)
     logger.info("Saved scan results.")
-    
-    # 2. FULL Parsed files with all details
-    def serialize_position(pos):
-        return {
-            "start_line": pos.start_line,
-            "end_line": pos.end_line,
-            "start_column": pos.start_column,
-            "end_column": pos.end_column
-        } if pos else None
-    
-    def serialize_method(method):
-        return {
-            "name": method.name,
-            "return_type": method.return_type,
-            "position": serialize_position(method.position),
-            "code": method.code,
-            "summary": method.summary,
-            "cluster_summary": getattr(method, "cluster_summary", ""),
-            "parent": None,  # avoid circular reference
-            "parent_cluster": None,
-            "is_false_positive": method.is_false_positive,
-            "is_vulnerable": method.is_vulnerable,
-            "vulnerability_metadata": method.vulnerability_meta,
-            "vulnerability": method.vulnerability,
-            "matched_string": method.matched_string,
-            "parameters": [{"name": p.name, "type": p.type} for p in method.parameters]
-        }
-    
-    def serialize_class(cls):
-        return {
-            "parent_file": None,  # avoid circular reference
-            "name": cls.name,
-            "position": serialize_position(cls.position),
-            "code": cls.code,
-            "summary": cls.summary,
-            "methods": [serialize_method(m) for m in cls.methods]
-        }
-    
-    def serialize_file(jfile):
-        return {
-            "path": jfile.path,
-            "code": jfile.code,
-            "classes": [serialize_class(c) for c in jfile.classes]
-        }
-    
-    parsed_full = [serialize_file(pf) for pf in parsed_files]
-    with open(os.path.join(OUTPUT_DIR, "parsed_files.json"), "w") as f:
-        json.dump(parsed_full, f, indent=2)
+
+    # 2. FULL Parsed files with all details - the models serialize themselves
+    # now that they are plain slots dataclasses (see src/parsers/objects.py)
+    parsed_full = [pf.to_dict() for pf in parsed_files]
+    _write_json(os.path.join(OUTPUT_DIR, "parsed_files.json"), parsed_full)
+    if msgpack is not None:
+        # Binary sidecar next to the JSON: generate_results prefers it on
+        # reload since msgpack parses several times faster at this size.
+        with open(os.path.join(OUTPUT_DIR, "parsed_files.msgpack"), "wb") as f:
+            f.write(msgpack.packb(parsed_full, use_bin_type=True))
     logger.info("Saved full parsed files.")
     
     # 3. Clusters (NEW: now contains classes, not methods)
@@ -313,13 +585,11 @@ def save_outputs(scan_results, parsed_files, clusters, summaries):
                 for cls in flat_cluster
             ]
         })
-    with open(os.path.join(OUTPUT_DIR, "clusters.json"), "w") as f:
-        json.dump(clusters_data, f, indent=2)
+    _write_json(os.path.join(OUTPUT_DIR, "clusters.json"), clusters_data)
     logger.info("Saved class clusters.")
-    
+
     # 4. Summaries
-    with open(os.path.join(OUTPUT_DIR, "summaries.json"), "w") as f:
-        json.dump(summaries, f, indent=2)
+    _write_json(os.path.join(OUTPUT_DIR, "summaries.json"), summaries)
     logger.info("Saved summaries.")
 
 # ============================
@@ -335,6 +605,11 @@ def main():
                         help="Path to existing MobSF scan JSON (if not scanning)")
     parser.add_argument("--no-summarize", action="store_true",
                         help="Skip summarization")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore the cached MobSF results and rescan")
+    parser.add_argument("--full-parse", action="store_true",
+                        help="Parse every Java file even with --mobsf-output "
+                             "(better clustering, slower)")
     parser.add_argument("--output-name", type=str,
                         help="Custom output directory name (default: timestamped)")
     args = parser.parse_args()
@@ -349,16 +624,28 @@ def main():
 
     # Scan or load
     if args.scan:
-        scan_results = scan_with_mobsf(args.dir)
+        scan_results = scan_with_mobsf(args.dir, use_cache=not args.no_cache)
     elif args.mobsf_output:
         logger.info(f"Loading existing MobSF scan from: {args.mobsf_output}")
-        with open(args.mobsf_output, "r") as f:
-            scan_results = json.load(f)
+        scan_results = _read_json(args.mobsf_output)
     else:
         logger.error("Either --scan or --mobsf-output must be provided")
         return
 
-    parsed_files = parse_codebase(args.dir)
+    # Fast path: with a pre-existing scan, only the files MobSF flagged need
+    # method-position granularity - skip parsing everything else unless the
+    # user asks for full clustering coverage via --full-parse.
+    only_filenames = None
+    if args.mobsf_output and not args.full_parse:
+        only_filenames = {
+            Path(f.get("file_path", "")).name
+            for vuln in scan_results.get("results", {}).values()
+            for f in vuln.get("files", [])
+        }
+        logger.info(f"Restricting parse to {len(only_filenames)} scan-referenced filenames "
+                    "(use --full-parse to parse everything)")
+
+    parsed_files = parse_codebase(args.dir, only_filenames=only_filenames)
     if not parsed_files:
         logger.warning("No Java files found. Exiting.")
         return
@@ -367,13 +654,15 @@ def main():
     logger.info("="*60)
     logger.info("Starting semantic class clustering...")
     logger.info("="*60)
-    clusters, clusterer_obj = cluster_classes_semantically(parsed_files)
+    # One fused pass produces both the flat class list and the filename index
+    flat_classes, parsed_by_filename = _index_parsed_files(parsed_files)
+    clusters, clusterer_obj = cluster_classes_flat(flat_classes)
     logger.info(f"Clustering completed. Generated {len(clusters)} clusters.")
 
     logger.info("="*60)
     logger.info("Identifying vulnerable methods from scan results...")
     logger.info("="*60)
-    vulnerable_methods = identify_vulnerable_methods(scan_results, parsed_files)
+    vulnerable_methods = identify_vulnerable_methods(scan_results, parsed_by_filename)
 
     summaries = {"clusters": {}, "classes": {}, "methods": {}}
     if not args.no_summarize:
@@ -1,33 +1,81 @@
 from typing import List, Tuple
 import logging
-from sklearn.cluster import KMeans
+import os
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.cluster import MiniBatchKMeans
 from sklearn.metrics import silhouette_score
 from src.clustering.codebert_clustering import CodeBERTClustering, CodeBERTClassClustering
 from src.parsers.objects import JavaMethod, JavaClass
 
 logger = logging.getLogger(__name__)
 
-def find_optimal_k(embeddings_np, min_k=4, max_k=15) -> int:
+def _fit_score(embeddings_np, k) -> Tuple[int, float]:
+    """Fit one candidate k and return its sampled silhouette score.
+
+    MiniBatchKMeans converges on a sample per iteration instead of the
+    full matrix, and the sampled silhouette avoids the O(n^2) distance
+    matrix that dominates for >1000 classes. n_init=1 here since each
+    worker already occupies a core.
+    """
+    kmeans = MiniBatchKMeans(
+        n_clusters=k, random_state=42, batch_size=1024, n_init=1, max_iter=100
+    )
+    labels = kmeans.fit_predict(embeddings_np)
+    score = silhouette_score(
+        embeddings_np, labels,
+        sample_size=min(len(embeddings_np), 1000),
+        random_state=42, metric='euclidean'
+    )
+    return k, score
+
+def find_optimal_k(embeddings_np, min_k=4, max_k=15, patience=3, n_jobs=-1) -> int:
+    # Convert once up front so sklearn doesn't re-copy the matrix per fit
+    embeddings_np = np.ascontiguousarray(embeddings_np, dtype=np.float32)
     best_k = min_k
     best_score = -1
-    for k in range(min_k, max_k + 1):
-        kmeans = KMeans(n_clusters=k, random_state=42)
-        labels = kmeans.fit_predict(embeddings_np)
-        score = silhouette_score(embeddings_np, labels)
-        logger.info(f"k={k} | Silhouette Score={score:.3f}")
-        if score > best_score:
-            best_score = score
-            best_k = k
+    no_improve = 0
+
+    # The candidate fits are embarrassingly parallel; run them a wave of
+    # cores at a time so the patience-based early stop still applies
+    # between waves.
+    ks = list(range(min_k, max_k + 1))
+    wave_size = os.cpu_count() or 4
+    stopped = False
+    for start in range(0, len(ks), wave_size):
+        wave = ks[start:start + wave_size]
+        results = Parallel(n_jobs=n_jobs, prefer='processes')(
+            delayed(_fit_score)(embeddings_np, k) for k in wave
+        )
+        for k, score in results:
+            logger.info(f"k={k} | Silhouette Score={score:.3f}")
+            if score > best_score:
+                best_score = score
+                best_k = k
+                no_improve = 0
+            else:
+                # Silhouette curves are typically unimodal in k - once the
+                # score has failed to improve for `patience` consecutive k's
+                # the peak is behind us and the remaining fits are wasted.
+                no_improve += 1
+                if no_improve >= patience:
+                    logger.info(f"No silhouette improvement for {patience} consecutive k - stopping sweep at k={k}")
+                    stopped = True
+                    break
+        if stopped:
+            break
     logger.info(f"Best number of clusters determined: {best_k}")
     return best_k
 
 def cluster_methods_semantically(parsed_files: List) -> Tuple[List[List[JavaMethod]], CodeBERTClustering]:
     """Legacy method clustering (kept for backward compatibility)"""
-    all_methods = [
-        method for file in parsed_files
-        for cls in file.classes
-        for method in cls.methods
-    ]
+    # One SoA read per file instead of re-walking classes/methods per column
+    all_methods = []
+    code_texts = []
+    for file in parsed_files:
+        columns = file.method_columns()
+        all_methods.extend(columns["methods"])
+        code_texts.extend(columns["codes"])
 
     if not all_methods:
         logger.warning("No methods found to cluster.")
@@ -35,8 +83,7 @@ def cluster_methods_semantically(parsed_files: List) -> Tuple[List[List[JavaMeth
 
     # Embed methods
     embedder = CodeBERTClustering()
-    code_texts = [method.code for method in all_methods]
-    embeddings = embedder.embedder.embed(code_texts).cpu().numpy()
+    embeddings = embedder.embedder.embed(code_texts)
 
     # Find best k with silhouette
     optimal_k = find_optimal_k(embeddings)
@@ -58,7 +105,10 @@ def cluster_classes_semantically(parsed_files: List) -> Tuple[List[List[JavaClas
         cls for file in parsed_files
         for cls in file.classes
     ]
+    return cluster_classes_flat(all_classes)
 
+def cluster_classes_flat(all_classes: List[JavaClass]) -> Tuple[List[List[JavaClass]], CodeBERTClassClustering]:
+    """Cluster an already-flattened class list (lets callers reuse one traversal)."""
     if not all_classes:
         logger.warning("No classes found to cluster.")
         return [], None
@@ -68,7 +118,7 @@ def cluster_classes_semantically(parsed_files: List) -> Tuple[List[List[JavaClas
     # Embed classes
     embedder = CodeBERTClassClustering()
     code_texts = [cls.code for cls in all_classes]
-    embeddings = embedder.embedder.embed(code_texts).cpu().numpy()
+    embeddings = embedder.embedder.embed(code_texts)
 
     # Find best k with silhouette
     optimal_k = find_optimal_k(embeddings, min_k=2, max_k=min(15, len(all_classes)-1))
@@ -5,15 +5,69 @@ This script replicates the logic from results_final.ipynb (cell 3)
 import json
 import os
 import logging
+from collections import defaultdict
+from functools import lru_cache
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=8192)
 def normalize_path(path):
-    """Normalize path for comparison"""
+    """Normalize path for comparison.
+
+    Memoized: MobSF reports many findings per file, so the same path is
+    normalized over and over inside the vulnerability loop.
+    """
     return path.replace("\\", "/").lower()
 
 
+def _load_json(path):
+    """Load a JSON file through orjson's C parser when available.
+
+    Multi-MB pipeline outputs (parsed_files.json in particular) make the
+    pure-Python stdlib tokenizer the wall-time hog of this module.
+    """
+    if orjson is not None:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    with open(path, "r", encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _file_method_index(parsed_file):
+    """
+    Build a line-lookup index for one parsed file: a start_line array sorted
+    ascending, the parallel end_line array, and (class_name, method_key)
+    refs in the same order. Finding the method containing a line is then a
+    single np.searchsorted instead of a scan over every class and method.
+    """
+    starts, ends, refs = [], [], []
+    for cls in parsed_file.get("classes", []):
+        class_name = cls.get("name", "")
+        for meth in cls.get("methods", []):
+            position = meth.get("position") or {}
+            starts.append(position.get("start_line", 0))
+            ends.append(position.get("end_line", 0))
+            refs.append((class_name, f"{class_name}.{meth.get('name', '')}"))
+
+    starts = np.asarray(starts, dtype=np.int64)
+    order = np.argsort(starts, kind="stable")
+    ends = np.asarray(ends, dtype=np.int64)[order]
+    return starts[order], ends, [refs[i] for i in order]
+
+
 def generate_final_results(output_dir: str) -> dict:
     """
     Generate final results.json with vulnerabilities mapped to methods
@@ -34,14 +88,18 @@ def generate_final_results(output_dir: str) -> dict:
 
     # Load data
     logger.info("Loading pipeline outputs...")
-    with open(SUMMARIES_PATH, "r", encoding='utf-8') as f:
-        summaries = json.load(f)
-    with open(CLUSTERS_PATH, "r", encoding='utf-8') as f:
-        clusters_data = json.load(f)
-    with open(MOBSF_SCAN_PATH, "r", encoding='utf-8') as f:
-        mobsf_scan = json.load(f)
-    with open(PARSED_FILES_PATH, "r", encoding='utf-8') as f:
-        parsed_files = json.load(f)
+    summaries = _load_json(SUMMARIES_PATH)
+    clusters_data = _load_json(CLUSTERS_PATH)
+    mobsf_scan = _load_json(MOBSF_SCAN_PATH)
+
+    # Prefer the binary sidecar written by the pipeline for the largest
+    # artifact; msgpack parses several times faster than JSON at this size.
+    msgpack_path = os.path.join(output_dir, "parsed_files.msgpack")
+    if msgpack is not None and os.path.exists(msgpack_path):
+        with open(msgpack_path, "rb") as f:
+            parsed_files = msgpack.unpackb(f.read(), raw=False)
+    else:
+        parsed_files = _load_json(PARSED_FILES_PATH)
 
     logger.info("✅ Files loaded!")
 
@@ -64,9 +122,18 @@ def generate_final_results(output_dir: str) -> dict:
 
     logger.info(f"✅ Mapped {len(class_to_cluster)} classes to clusters")
 
+    # Index parsed files by basename once; the old code compared every
+    # vulnerability against every file/class/method pair with str.endswith.
+    logger.info("Indexing parsed files by basename...")
+    by_basename = defaultdict(list)
+    for parsed_file in parsed_files:
+        basename = normalize_path(parsed_file.get("path", "")).rsplit("/", 1)[-1]
+        by_basename[basename].append((parsed_file, _file_method_index(parsed_file)))
+
     # Build results from MobSF vulnerabilities
     logger.info("Building results from MobSF vulnerabilities...")
     results = []
+    seen = set()  # dedup (file, line, vulnerability) at insertion time
     vulnerabilities_found = {}
 
     for vuln_name, vuln_detail in mobsf_scan.get("results", {}).items():
@@ -85,56 +152,53 @@ def generate_final_results(output_dir: str) -> dict:
 
             # Normalize paths for matching
             vuln_path_norm = normalize_path(vuln_file_path)
-
-            # Find matching file in parsed_files
-            method_found = False
-            for parsed_file in parsed_files:
-                pf_path = parsed_file.get("path", "")
-                pf_path_norm = normalize_path(pf_path)
-
-                # Check if paths match
-                if pf_path_norm.endswith(vuln_path_norm.split("/")[-1]) or vuln_path_norm in pf_path_norm:
-                    # Find which method contains this line
-                    for cls in parsed_file.get("classes", []):
-                        class_name = cls.get("name", "")
-
-                        for meth in cls.get("methods", []):
-                            method_name = meth.get("name", "")
-                            method_key = f"{class_name}.{method_name}"
-
-                            # Get method line range
-                            method_start = meth.get("position", {}).get("start_line", 0)
-                            method_end = meth.get("position", {}).get("end_line", 0)
-
-                            # Check if vulnerability line is inside this method
-                            if method_start <= vuln_line <= method_end:
-                                # NEW: Get cluster ID from parent class (not method)
-                                cluster_id = class_to_cluster.get(class_name, None)
-
-                                # Build result entry
-                                result_entry = {
-                                    "file": pf_path,
-                                    "line": vuln_line,  # EXACT line from MobSF
-                                    "method": method_key,
-                                    "vulnerability": vuln_name,
-                                    "match": match_string.strip(),
-                                    "summaries": {
-                                        "method": summaries.get("methods", {}).get(method_key, ""),
-                                        "class": summaries.get("classes", {}).get(class_name, ""),
-                                        "cluster": summaries.get("clusters", {}).get(cluster_id, "") if cluster_id else ""
-                                    }
-                                }
-
-                                results.append(result_entry)
-                                vulnerabilities_found[vuln_name] += 1
-                                method_found = True
-                                break  # Found the method, stop searching
-
-                        if method_found:
-                            break
-
-                    if method_found:
-                        break
+            vuln_basename = vuln_path_norm.rsplit("/", 1)[-1]
+
+            # O(1) basename lookup, then binary search on method start lines
+            for pf, (starts, ends, refs) in by_basename.get(vuln_basename, ()):
+                if len(starts) == 0:
+                    continue
+
+                # Rightmost method starting at or before the vulnerable line.
+                # Spans can overlap (an anonymous listener's method nests
+                # inside the enclosing method's span), so if the nearest
+                # start's span ends too early, scan back through the earlier
+                # candidates - every one of them also starts at or before
+                # the line - for the innermost span that still contains it.
+                idx = int(np.searchsorted(starts, vuln_line, side="right")) - 1
+                while idx >= 0 and vuln_line > ends[idx]:
+                    idx -= 1
+                if idx < 0:
+                    continue
+
+                class_name, method_key = refs[idx]
+
+                pf_path = pf.get("path", "")
+                key = (pf_path, vuln_line, vuln_name)
+                if key in seen:
+                    break
+                seen.add(key)
+
+                # NEW: Get cluster ID from parent class (not method)
+                cluster_id = class_to_cluster.get(class_name, None)
+
+                # Build result entry
+                result_entry = {
+                    "file": pf_path,
+                    "line": vuln_line,  # EXACT line from MobSF
+                    "method": method_key,
+                    "vulnerability": vuln_name,
+                    "match": match_string.strip(),
+                    "summaries": {
+                        "method": summaries.get("methods", {}).get(method_key, ""),
+                        "class": summaries.get("classes", {}).get(class_name, ""),
+                        "cluster": summaries.get("clusters", {}).get(cluster_id, "") if cluster_id else ""
+                    }
+                }
+
+                results.append(result_entry)
+                vulnerabilities_found[vuln_name] += 1
+                break  # Found the method, stop searching
 
     logger.info(f"✅ Found {len(results)} vulnerability instances")
     logger.info("📊 Vulnerabilities breakdown:")
@@ -142,16 +206,8 @@ def generate_final_results(output_dir: str) -> dict:
         if count > 0:
             logger.info(f"   {vuln_name}: {count} instances")
 
-    # Remove exact duplicates (same file, line, vulnerability)
-    logger.info("Removing exact duplicates...")
-    unique_results = []
-    seen = set()
-    for r in results:
-        key = (r["file"], r["line"], r["vulnerability"])
-        if key not in seen:
-            seen.add(key)
-            unique_results.append(r)
-
+    # Duplicates are dropped at insertion time, so results is already unique
+    unique_results = results
     logger.info(f"✅ {len(unique_results)} unique vulnerability instances")
 
     # Sort by file and line
@@ -159,8 +215,12 @@ def generate_final_results(output_dir: str) -> dict:
 
     # Save results
     output_data = {"results": unique_results}
-    with open(RESULTS_PATH, "w", encoding='utf-8') as f:
-        json.dump(output_data, f, indent=2, ensure_ascii=False)
+    if orjson is not None:
+        with open(RESULTS_PATH, "wb") as f:
+            f.write(orjson.dumps(output_data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(RESULTS_PATH, "w", encoding='utf-8') as f:
+            json.dump(output_data, f, indent=2, ensure_ascii=False)
 
     logger.info(f"✅ Results written to {RESULTS_PATH}")
     logger.info("📈 Final statistics:")
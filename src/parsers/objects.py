@@ -1,8 +1,10 @@
 # src/objects.py
 
 from __future__ import annotations
+from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+
+import numpy as np
 
 # This helper function can be moved to a utils.py file if you have one
 def get_method_signature_to_str(name: str, return_type: str, parameters: List[JavaParameter]) -> str:
@@ -10,7 +12,8 @@ def get_method_signature_to_str(name: str, return_type: str, parameters: List[Ja
     param_str = ", ".join([f"{p.type} {p.name}" for p in parameters])
     return f"{return_type} {name}({param_str})"
 
-class Position(BaseModel):
+@dataclass(slots=True)
+class Position:
     """Represents a code span with line and column numbers."""
     start_line: int
     end_line: int
@@ -18,45 +21,116 @@ class Position(BaseModel):
     end_column: int
 
     def to_dict(self) -> Dict[str, int]:
-        return self.model_dump()
+        return {
+            "start_line": self.start_line,
+            "end_line": self.end_line,
+            "start_column": self.start_column,
+            "end_column": self.end_column
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, int]) -> Position:
+        return cls(
+            start_line=data["start_line"],
+            end_line=data["end_line"],
+            start_column=data["start_column"],
+            end_column=data["end_column"]
+        )
 
-class JavaParameter(BaseModel):
+@dataclass(slots=True)
+class JavaParameter:
     """Represents a Java method parameter with a name and type."""
     name: str
     type: str = "unknown"
 
     def to_dict(self) -> Dict[str, str]:
-        return self.model_dump()
+        return {"name": self.name, "type": self.type}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, str]) -> JavaParameter:
+        return cls(name=data.get("name", "unknown"), type=data.get("type", "unknown"))
+
+@dataclass(slots=True, eq=False)
+class JavaMethod:
+    """Represents a parsed Java method with its attributes and metadata.
 
-class JavaMethod(BaseModel):
-    """Represents a parsed Java method with its attributes and metadata."""
+    Source text is stored as byte offsets into the parent file and sliced on
+    demand via the `code` property, so the method body is not duplicated in
+    RAM next to the file's own source.
+    """
     parent: Any  # To avoid circular dependency issues, can be refined later
     name: str
     return_type: str
-    # Use 'alias' to gracefully handle the 'paremeters' typo from the original file
-    parameters: List[JavaParameter] = Field(default_factory=list, alias="paremeters")
     position: Position
-    code: str
+    start_byte: int = -1
+    end_byte: int = -1
+    _code: Optional[str] = field(default=None, repr=False)
+    parameters: List[JavaParameter] = field(default_factory=list)
     summary: str = ""
     cluster_summary: str = ""
-    parent_cluster: Optional[Any] = None
+    parent_cluster: Optional[Any] = field(default=None, repr=False)
     is_false_positive: Optional[bool] = None
     is_vulnerable: bool = False
     vulnerability_meta: Optional[Dict[str, Any]] = None
     vulnerability: Optional[str] = None
     matched_string: str = ""
 
-    class Config:
-        validate_by_name = True # Use the new name for Pydantic V2
-
     @property
     def signature(self) -> str:
         """Dynamically generates the full method signature string."""
         return get_method_signature_to_str(self.name, self.return_type, self.parameters)
 
+    @property
+    def code(self) -> str:
+        """Materializes the method source by slicing the parent file's bytes."""
+        if self._code is not None:
+            return self._code
+        if self.parent is None or self.parent.parent_file is None or self.start_byte < 0:
+            return ""
+        return self.parent.parent_file.code_bytes[self.start_byte:self.end_byte].decode("utf8", errors="ignore")
+
     def to_dict(self) -> Dict[str, Any]:
         """Serializes the object to a dictionary, excluding circular references."""
-        return self.model_dump(exclude={'parent', 'parent_cluster'})
+        return {
+            "name": self.name,
+            "return_type": self.return_type,
+            "position": self.position.to_dict() if self.position else None,
+            "code": self.code,
+            "summary": self.summary,
+            "cluster_summary": self.cluster_summary,
+            "parent": None,  # avoid circular reference
+            "parent_cluster": None,
+            "is_false_positive": self.is_false_positive,
+            "is_vulnerable": self.is_vulnerable,
+            "vulnerability_metadata": self.vulnerability_meta,
+            "vulnerability": self.vulnerability,
+            "matched_string": self.matched_string,
+            "parameters": [p.to_dict() for p in self.parameters]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], parent: Any = None) -> JavaMethod:
+        """Rebuilds a method from its serialized form.
+
+        Accepts the historical 'paremeters' misspelling alongside
+        'parameters' so older result JSON stays loadable.
+        """
+        raw_params = data.get("parameters", data.get("paremeters")) or []
+        return cls(
+            parent=parent,
+            name=data["name"],
+            return_type=data.get("return_type", "void"),
+            position=Position.from_dict(data["position"]) if data.get("position") else None,
+            _code=data.get("code", ""),
+            parameters=[JavaParameter.from_dict(p) for p in raw_params],
+            summary=data.get("summary", ""),
+            cluster_summary=data.get("cluster_summary", ""),
+            is_false_positive=data.get("is_false_positive"),
+            is_vulnerable=data.get("is_vulnerable", False),
+            vulnerability_meta=data.get("vulnerability_metadata"),
+            vulnerability=data.get("vulnerability"),
+            matched_string=data.get("matched_string", "")
+        )
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, JavaMethod):
@@ -66,17 +140,54 @@ class JavaMethod(BaseModel):
     def __hash__(self) -> int:
         return hash((self.parent.name, self.signature))
 
-class JavaClass(BaseModel):
-    """Represents a parsed Java class and contains a list of its methods."""
+@dataclass(slots=True, eq=False)
+class JavaClass:
+    """Represents a parsed Java class and contains a list of its methods.
+
+    Like JavaMethod, source text is kept as byte offsets into the parent
+    file and materialized on demand through the `code` property.
+    """
     parent_file: Any
     name: str
     position: Position
-    code: str
+    start_byte: int = -1
+    end_byte: int = -1
+    _code: Optional[str] = field(default=None, repr=False)
     summary: str = ""
-    methods: List[JavaMethod] = Field(default_factory=list)
+    methods: List[JavaMethod] = field(default_factory=list)
+
+    @property
+    def code(self) -> str:
+        """Materializes the class source by slicing the parent file's bytes."""
+        if self._code is not None:
+            return self._code
+        if self.parent_file is None or self.start_byte < 0:
+            return ""
+        return self.parent_file.code_bytes[self.start_byte:self.end_byte].decode("utf8", errors="ignore")
 
     def to_dict(self) -> Dict[str, Any]:
-        return self.model_dump(exclude={'parent_file'})
+        return {
+            "parent_file": None,  # avoid circular reference
+            "name": self.name,
+            "position": self.position.to_dict() if self.position else None,
+            "code": self.code,
+            "summary": self.summary,
+            "methods": [m.to_dict() for m in self.methods]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], parent_file: Any = None) -> JavaClass:
+        java_class = cls(
+            parent_file=parent_file,
+            name=data["name"],
+            position=Position.from_dict(data["position"]) if data.get("position") else None,
+            _code=data.get("code", ""),
+            summary=data.get("summary", "")
+        )
+        java_class.methods = [
+            JavaMethod.from_dict(m, parent=java_class) for m in data.get("methods", [])
+        ]
+        return java_class
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, JavaClass):
@@ -86,16 +197,86 @@ class JavaClass(BaseModel):
     def __hash__(self) -> int:
         return hash((self.name, tuple(self.methods)))
 
-class JavaFile(BaseModel):
+@dataclass(slots=True)
+class JavaFile:
     """Represents a single parsed Java file and contains a list of its classes."""
     path: str
     code: str
-    classes: List[JavaClass] = Field(default_factory=list)
+    classes: List[JavaClass] = field(default_factory=list)
+    _method_columns: Optional[Dict[str, Any]] = field(default=None, repr=False)
+    _code_bytes: Optional[bytes] = field(default=None, repr=False)
+
+    @property
+    def code_bytes(self) -> bytes:
+        """The file source encoded once; tree-sitter byte offsets index this."""
+        if self._code_bytes is None:
+            self._code_bytes = self.code.encode("utf8")
+        return self._code_bytes
 
     def get_all_methods(self) -> List[JavaMethod]:
         """Returns a flat list of all methods contained within this file."""
         return [method for cls in self.classes for method in cls.methods]
 
+    def method_columns(self) -> Dict[str, Any]:
+        """Cached struct-of-arrays view over every method in the file.
+
+        Parallel columns ('methods', 'codes', 'class_names', 'method_keys')
+        plus an int32 (n, 4) position matrix of (start_line, end_line,
+        start_column, end_column). Bulk consumers such as the clustering
+        feed read one contiguous column instead of chasing attributes
+        method-by-method; built lazily and reused across passes.
+        """
+        if self._method_columns is None:
+            methods = self.get_all_methods()
+            positions = np.zeros((len(methods), 4), dtype=np.int32)
+            for i, m in enumerate(methods):
+                if m.position is not None:
+                    positions[i] = (
+                        m.position.start_line, m.position.end_line,
+                        m.position.start_column, m.position.end_column
+                    )
+            class_index = {id(c): i for i, c in enumerate(self.classes)}
+            self._method_columns = {
+                "methods": methods,
+                "names": [m.name for m in methods],
+                "codes": [m.code for m in methods],
+                "class_names": [m.parent.name for m in methods],
+                "class_idx": [class_index.get(id(m.parent), -1) for m in methods],
+                "method_keys": [f"{m.parent.name}.{m.name}" for m in methods],
+                "positions": positions
+            }
+        return self._method_columns
+
+    @property
+    def method_names(self) -> List[str]:
+        """Flat column of method names, parallel to `method_codes`."""
+        return self.method_columns()["names"]
+
+    @property
+    def method_codes(self) -> List[str]:
+        """Flat column of method source strings across every class.
+
+        Feeds batch consumers (tokenizers, embedders) directly, replacing
+        `[m.code for cls in file.classes for m in cls.methods]` call sites.
+        """
+        return self.method_columns()["codes"]
+
+    @property
+    def method_class_idx(self) -> List[int]:
+        """Index into `self.classes` of each method's owning class."""
+        return self.method_columns()["class_idx"]
+
     def to_dict(self) -> Dict[str, Any]:
-        return self.model_dump()
+        return {
+            "path": self.path,
+            "code": self.code,
+            "classes": [c.to_dict() for c in self.classes]
+        }
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> JavaFile:
+        java_file = cls(path=data["path"], code=data.get("code", ""))
+        java_file.classes = [
+            JavaClass.from_dict(c, parent_file=java_file) for c in data.get("classes", [])
+        ]
+        return java_file
@@ -1,7 +1,9 @@
 # src/parsers/parsing.py
 
+import functools
 import logging
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Union
 import os
 
 from tree_sitter import Language, Parser, Node
@@ -20,6 +22,11 @@ if not os.path.exists(LIB_PATH):
 
 JAVA_LANGUAGE = Language(LIB_PATH, "java")
 
+# Queries compiled once at import time; the tree-sitter query compiler is
+# expensive enough to matter when it used to run per file (and per method).
+_CLASS_Q = JAVA_LANGUAGE.query("(class_declaration) @class")
+_METHOD_Q = JAVA_LANGUAGE.query("(method_declaration) @method")
+
 class TreeSitterParser:
     """A robust Java parser using Tree-sitter for detailed and accurate CST extraction."""
 
@@ -27,10 +34,20 @@ class TreeSitterParser:
         """Initializes the parser and sets the language to Java."""
         self.parser = Parser()
         self.parser.set_language(JAVA_LANGUAGE)
+        self._text_cache = {}
 
     def _get_node_text(self, node: Node) -> str:
-        """Helper to safely decode a Tree-sitter node's text."""
-        return node.text.decode('utf8')
+        """Helper to safely decode a Tree-sitter node's text.
+
+        Memoized per parsed file: identifier/type nodes repeat often, and the
+        cache turns their repeated bytes->str decodes into dict hits.
+        """
+        key = (node.start_byte, node.end_byte)
+        text = self._text_cache.get(key)
+        if text is None:
+            text = node.text.decode('utf8')
+            self._text_cache[key] = text
+        return text
 
     def _create_position(self, node: Node) -> Position:
         """Helper to create a Position object from a node."""
@@ -42,36 +59,50 @@ class TreeSitterParser:
         )
 
     def _extract_parameters(self, params_node: Node) -> List[JavaParameter]:
-        """Extracts all formal parameters from a method's 'formal_parameters' node."""
+        """Extracts all formal parameters from a method's 'formal_parameters' node.
+
+        Walks the node's named children directly - one linear pass instead of
+        a query plus a dict grouped by parent id.
+        """
         parameters = []
-        param_query = JAVA_LANGUAGE.query("(formal_parameter type: (_) @type name: (identifier) @name)")
-        captures = param_query.captures(params_node)
-        
-        param_map = {}
-        for node, name in captures:
-            param_id = node.parent.id
-            if param_id not in param_map:
-                param_map[param_id] = {}
-            param_map[param_id][name] = self._get_node_text(node)
-
-        for _, details in param_map.items():
-            parameters.append(JavaParameter(name=details.get('name', 'unknown'), type=details.get('type', 'unknown')))
-            
+        for child in params_node.named_children:
+            if child.type != 'formal_parameter':
+                continue
+            type_node = child.child_by_field_name('type')
+            name_node = child.child_by_field_name('name')
+            parameters.append(JavaParameter(
+                name=self._get_node_text(name_node) if name_node else 'unknown',
+                type=self._get_node_text(type_node) if type_node else 'unknown'
+            ))
         return parameters
 
-    def parse_java_file(self, source_code: str, file_path: str) -> JavaFile:
-        """Parses an entire Java file and returns a structured JavaFile object."""
-        tree = self.parser.parse(bytes(source_code, "utf8"))
+    def parse_java_file(self, source_code: Union[str, bytes], file_path: str) -> JavaFile:
+        """Parses an entire Java file and returns a structured JavaFile object.
+
+        Accepts either a str or a raw bytes buffer (e.g. an mmap'ed file) so
+        callers reading files in binary mode avoid a decode/re-encode round-trip.
+        """
+        if isinstance(source_code, str):
+            source_bytes = source_code.encode("utf8")
+        else:
+            # bytes / bytearray / mmap: tree-sitter consumes the buffer directly
+            source_bytes = bytes(source_code)
+            source_code = source_bytes.decode("utf8", errors="ignore")
+
+        self._text_cache.clear()
+        tree = self.parser.parse(source_bytes)
         root_node = tree.root_node
-        
+
         if root_node.has_error:
             logger.warning(f"Syntax errors detected in {file_path}. Parsing will continue but may be incomplete.")
 
         java_file = JavaFile(path=file_path, code=source_code)
-        
-        class_query = JAVA_LANGUAGE.query("(class_declaration) @class")
-        
-        for class_node, _ in class_query.captures(root_node):
+        # Hand the file the exact buffer the parser saw: re-encoding the
+        # (lossily) decoded string would shift every byte offset after the
+        # first non-UTF-8 byte, corrupting the code-slice properties.
+        java_file._code_bytes = source_bytes
+
+        for class_node, _ in _CLASS_Q.captures(root_node):
             class_name_node = class_node.child_by_field_name('name')
             if not class_name_node: continue
             
@@ -79,18 +110,17 @@ class TreeSitterParser:
                 parent_file=java_file,
                 name=self._get_node_text(class_name_node),
                 position=self._create_position(class_node),
-                code=self._get_node_text(class_node)
+                # Byte offsets instead of a copied source string; .code
+                # slices the parent file lazily.
+                start_byte=class_node.start_byte,
+                end_byte=class_node.end_byte
             )
             
             class_body_node = class_node.child_by_field_name('body')
             if not class_body_node: continue
 
-            # --- CORRECTED METHOD QUERY ---
-            # This query is simpler and more reliable. It just finds all method_declaration nodes.
-            method_query = JAVA_LANGUAGE.query("(method_declaration) @method")
-            
             methods_in_class = []
-            for method_node, _ in method_query.captures(class_body_node):
+            for method_node, _ in _METHOD_Q.captures(class_body_node):
                 # Use child_by_field_name for reliable access to parts of the method
                 method_name_node = method_node.child_by_field_name('name')
                 return_type_node = method_node.child_by_field_name('type')
@@ -105,10 +135,33 @@ class TreeSitterParser:
                     return_type=self._get_node_text(return_type_node) if return_type_node else "void",
                     parameters=self._extract_parameters(parameters_node) if parameters_node else [],
                     position=self._create_position(method_node),
-                    code=self._get_node_text(method_node)
+                    start_byte=method_node.start_byte,
+                    end_byte=method_node.end_byte
                 ))
 
             java_class.methods = methods_in_class
             java_file.classes.append(java_class)
-            
+
         return java_file
+
+    @staticmethod
+    def parse_files(paths: List[str]) -> List[JavaFile]:
+        """Parses many Java files in parallel across CPU cores.
+
+        Parsing is CPU-bound and independent per file, so this fans out over
+        a process pool; each worker keeps one parser alive for its lifetime.
+        """
+        with ProcessPoolExecutor() as executor:
+            return list(executor.map(_parse_one_file, paths, chunksize=8))
+
+
+@functools.lru_cache(maxsize=1)
+def _worker_parser() -> TreeSitterParser:
+    """One parser per worker process; tree-sitter parsers aren't fork-safe."""
+    return TreeSitterParser()
+
+
+def _parse_one_file(path: str) -> JavaFile:
+    with open(path, 'rb') as f:
+        source = f.read()
+    return _worker_parser().parse_java_file(source, path)
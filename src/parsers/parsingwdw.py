@@ -1,7 +1,9 @@
 # src/parsers/parsing.py
 
 import logging
-from typing import List
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Union
 import os
 
 from tree_sitter import Language, Parser, Node
@@ -14,12 +16,41 @@ if not os.path.exists(LIB_PATH):
     Language.build_library(LIB_PATH, ["tree-sitter-java"])
 JAVA_LANGUAGE = Language(LIB_PATH, "java")
 
+# One query, compiled once at import, for the patterns that genuinely need
+# the query engine (class-like declarations anywhere in the tree, parameter
+# type/name pairs). Methods and constructors are found by walking each
+# captured class's body subtree instead - no capture objects or matching
+# machinery for a trivial node-kind test.
+UNIFIED_QUERY = JAVA_LANGUAGE.query("""
+    (class_declaration) @class
+    (interface_declaration) @class
+    (enum_declaration) @class
+    (annotation_type_declaration) @class
+    (formal_parameter
+        type: (_) @param.type
+        name: (identifier) @param.name
+    )
+""")
+PARAM_QUERY = JAVA_LANGUAGE.query("""
+    (formal_parameter
+        type: (_) @type
+        name: (identifier) @name
+    )
+""")
+
 class TreeSitterParser:
     def __init__(self):
         self.parser = Parser()
         self.parser.set_language(JAVA_LANGUAGE)
+        self._src_bytes = None
 
     def _get_node_text(self, node: Node) -> str:
+        # Slice the file's single encoded buffer by byte offsets; node.text
+        # materializes a fresh bytes object per call, which adds up over
+        # every name/type node in a repo-wide scan.
+        buf = self._src_bytes
+        if buf is not None:
+            return buf[node.start_byte:node.end_byte].decode('utf8')
         return node.text.decode('utf8')
 
     def _create_position(self, node: Node) -> Position:
@@ -31,85 +62,149 @@ class TreeSitterParser:
         )
 
     def _extract_parameters(self, params_node: Node) -> List[JavaParameter]:
+        # matches() already groups captures per formal_parameter, so each
+        # match yields one JavaParameter directly - no dict keyed on
+        # node.parent.id and no setdefault churn per capture.
         parameters = []
-        query = JAVA_LANGUAGE.query("""
-            (formal_parameter
-                type: (_) @type
-                name: (identifier) @name
-            )
-        """)
-        captures = query.captures(params_node)
-        param_map = {}
-        for node, name in captures:
-            pid = node.parent.id
-            param_map.setdefault(pid, {})[name] = self._get_node_text(node)
-        for details in param_map.values():
+        for _, captures in PARAM_QUERY.matches(params_node):
+            type_node = captures.get("type")
+            name_node = captures.get("name")
+            if type_node is None or name_node is None:
+                continue
             parameters.append(JavaParameter(
-                name=details.get("name", "unknown"),
-                type=details.get("type", "unknown")
+                name=self._get_node_text(name_node),
+                type=self._get_node_text(type_node)
             ))
         return parameters
 
-    def parse_java_file(self, source_code: str, file_path: str) -> JavaFile:
-        tree = self.parser.parse(source_code.encode("utf8"))
+    def parse_java_file(self, source_code: Union[str, bytes], file_path: str) -> JavaFile:
+        # Accepts raw bytes so binary-mode readers skip the decode/re-encode
+        # round-trip; tree-sitter consumes the byte buffer either way.
+        if isinstance(source_code, str):
+            src_bytes = source_code.encode("utf8")
+        else:
+            src_bytes = bytes(source_code)
+            source_code = src_bytes.decode("utf8", errors="ignore")
+        self._src_bytes = src_bytes
+        tree = self.parser.parse(src_bytes)
         root = tree.root_node
         java_file = JavaFile(path=file_path, code=source_code)
-
-        # Match classes, interfaces, enums, annotations
-        class_query = JAVA_LANGUAGE.query("""
-            (class_declaration) @class
-            (interface_declaration) @class
-            (enum_declaration) @class
-            (annotation_type_declaration) @class
-        """)
-        class_captures = class_query.captures(root)
-
-        for class_node, _ in class_captures:
-            name_node = class_node.child_by_field_name("name")
-            if not name_node:
-                continue
-
-            java_class = JavaClass(
-                parent_file=java_file,
-                name=self._get_node_text(name_node),
-                position=self._create_position(class_node),
-                code=self._get_node_text(class_node)
-            )
-
+        # Byte offsets must index the buffer the parser saw, not a
+        # re-encoding of the lossily decoded string
+        java_file._code_bytes = src_bytes
+
+        # Single traversal: collect everything in one captures() pass and
+        # dispatch by capture name, instead of re-querying each class body.
+        # Hot loop: bind the methods touched per capture to locals so each
+        # iteration skips the attribute and global lookups.
+        get_text = self._get_node_text
+        create_position = self._create_position
+        class_entries = []      # (class node, JavaClass) in document order
+        params_by_owner = {}    # method/ctor node id -> [JavaParameter]
+        pending_params = {}     # formal_parameter id -> partial {type, name}
+        append_class = java_file.classes.append
+
+        for node, capture in UNIFIED_QUERY.captures(root):
+            if capture == "class":
+                name_node = node.child_by_field_name("name")
+                if not name_node:
+                    continue
+                java_class = JavaClass(
+                    parent_file=java_file,
+                    name=get_text(name_node),
+                    position=create_position(node),
+                    start_byte=node.start_byte,
+                    end_byte=node.end_byte
+                )
+                class_entries.append((node, java_class))
+                append_class(java_class)
+            else:  # param.type / param.name
+                formal_param = node.parent
+                entry = pending_params.setdefault(formal_param.id, {})
+                entry["type" if capture == "param.type" else "name"] = get_text(node)
+                if len(entry) == 2:
+                    # formal_parameters -> method/constructor declaration
+                    owner = formal_param.parent.parent
+                    params_by_owner.setdefault(owner.id, []).append(
+                        JavaParameter(name=entry["name"], type=entry["type"])
+                    )
+
+        # Pre-order walk of each captured class's body subtree, stopping at
+        # nested captured classes (they own their members via their own
+        # entry). Members are NOT always direct body children: enum methods
+        # and constructors sit under enum_body_declarations, and methods in
+        # anonymous class_body nodes (listeners etc.) belong - as in the
+        # query-based version - to the nearest enclosing captured class.
+        captured_ids = {class_node.id for class_node, _ in class_entries}
+        lookup_params = params_by_owner.get
+        for class_node, java_class in class_entries:
             body_node = class_node.child_by_field_name("body")
             if body_node is None:
-                java_file.classes.append(java_class)
                 continue
-
-            # Method declarations
-            method_query = JAVA_LANGUAGE.query("(method_declaration) @method")
-            for method_node, _ in method_query.captures(body_node):
-                m_name = method_node.child_by_field_name("name")
-                m_type = method_node.child_by_field_name("type")
-                params = method_node.child_by_field_name("parameters")
-                if m_name:
-                    java_class.methods.append(JavaMethod(
+            append_method = java_class.methods.append
+            stack = list(reversed(body_node.named_children))
+            while stack:
+                child = stack.pop()
+                if child.id in captured_ids:
+                    continue
+                kind = child.type
+                if kind == "method_declaration":
+                    m_name = child.child_by_field_name("name")
+                    if not m_name:
+                        continue
+                    m_type = child.child_by_field_name("type")
+                    append_method(JavaMethod(
                         parent=java_class,
-                        name=self._get_node_text(m_name),
-                        return_type=self._get_node_text(m_type) if m_type else "void",
-                        parameters=self._extract_parameters(params) if params else [],
-                        position=self._create_position(method_node),
-                        code=self._get_node_text(method_node)
+                        name=get_text(m_name),
+                        return_type=get_text(m_type) if m_type else "void",
+                        parameters=lookup_params(child.id, []),
+                        position=create_position(child),
+                        start_byte=child.start_byte,
+                        end_byte=child.end_byte
                     ))
-
-            # Constructor declarations
-            ctor_query = JAVA_LANGUAGE.query("(constructor_declaration) @ctor")
-            for ctor_node, _ in ctor_query.captures(body_node):
-                params = ctor_node.child_by_field_name("parameters")
-                java_class.methods.append(JavaMethod(
-                    parent=java_class,
-                    name=java_class.name,
-                    return_type=java_class.name,
-                    parameters=self._extract_parameters(params) if params else [],
-                    position=self._create_position(ctor_node),
-                    code=self._get_node_text(ctor_node)
-                ))
-
-            java_file.classes.append(java_class)
+                elif kind == "constructor_declaration":
+                    append_method(JavaMethod(
+                        parent=java_class,
+                        name=java_class.name,
+                        return_type=java_class.name,
+                        parameters=lookup_params(child.id, []),
+                        position=create_position(child),
+                        start_byte=child.start_byte,
+                        end_byte=child.end_byte
+                    ))
+                # Descend (pre-order); method bodies are included so members
+                # of anonymous classes inside them are still collected
+                stack.extend(reversed(child.named_children))
 
         return java_file
+
+
+# Per-thread parser singleton: reuses the Parser and its language binding
+# instead of re-instantiating per call. Thread-local rather than global
+# because a tree_sitter.Parser is not safe for concurrent parse calls.
+_thread_local = threading.local()
+
+def get_parser() -> TreeSitterParser:
+    parser = getattr(_thread_local, "parser", None)
+    if parser is None:
+        parser = TreeSitterParser()
+        _thread_local.parser = parser
+    return parser
+
+
+def _parse_one_file(path: str) -> JavaFile:
+    # Raw bytes straight into the parser; no decode on the hot path
+    with open(path, 'rb') as f:
+        source = f.read()
+    # get_parser() gives each worker process its own cached parser
+    return get_parser().parse_java_file(source, path)
+
+
+def parse_files(paths: List[str]) -> List[JavaFile]:
+    """Parse many Java files in parallel across CPU cores.
+
+    Parsing is CPU-bound in the tree-sitter C core and independent per
+    file, so fanning out over a process pool scales near-linearly.
+    """
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        return list(executor.map(_parse_one_file, paths, chunksize=8))
@@ -19,8 +19,9 @@ logger = logging.getLogger()
 def make_dummy_method(code: str, name: str="dummy", return_type: str="void") -> JavaMethod:
     pos = Position(start_line=1, end_line=10, start_column=0, end_column=0)
     params = [JavaParameter(name="param1", type="int")]
-    # Provide None or a dummy for the parent field
-    return JavaMethod(file=None, name=name, return_type=return_type, parameters=params, position=pos, code=code, parent=None)
+    # No parent class here, so pass the source through _code (the code
+    # property falls back to it when there's no file buffer to slice)
+    return JavaMethod(parent=None, name=name, return_type=return_type, parameters=params, position=pos, _code=code)
 
 def test_codebert_clustering():
     methods = [
@@ -0,0 +1,61 @@
+"""
+SQLite-backed prompt -> summary cache shared by the summarizer classes.
+
+Keyed by SHA-256 of (model name + exact prompt), so unchanged classes and
+clusters cost zero generations on repeat pipeline runs, and identical
+prompts within one run hit after the first generation.
+"""
+import hashlib
+import logging
+import sqlite3
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Sits next to the other content-addressed caches under .cache/
+CACHE_DB_PATH = Path(".cache/summaries.sqlite")
+
+
+class PromptCache:
+    def __init__(self, db_path=CACHE_DB_PATH):
+        try:
+            db_path = Path(db_path)
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                "prompt_sha256 TEXT PRIMARY KEY, summary TEXT, model TEXT)"
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Prompt cache unavailable: {e}")
+            self._conn = None
+
+    @staticmethod
+    def key(model_name: str, prompt: str) -> str:
+        return hashlib.sha256((model_name + prompt).encode()).hexdigest()
+
+    def get(self, model_name: str, prompt: str):
+        if self._conn is None:
+            return None
+        try:
+            row = self._conn.execute(
+                "SELECT summary FROM summaries WHERE prompt_sha256 = ?",
+                (self.key(model_name, prompt),)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Prompt cache read failed: {e}")
+            return None
+        return row[0] if row else None
+
+    def put(self, model_name: str, prompt: str, summary: str):
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?)",
+                (self.key(model_name, prompt), summary, model_name)
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Prompt cache write failed: {e}")